@@ -1,10 +1,14 @@
 # Import necessary libraries for type hints and LangChain components
 from typing import TypedDict, List  # For defining the state structure
 from langchain_core.messages import HumanMessage, AIMessage  # Message types for user and AI
-from langchain_google_genai import ChatGoogleGenerativeAI  # Gemini 2.5 Pro model
 from langgraph.graph import StateGraph, START, END  # For building the workflow graph
 from dotenv import load_dotenv  # For loading environment variables
-import os  # For accessing environment variables
+from prompt_toolkit import PromptSession  # Async terminal input with history
+from compaction import compact_messages, needs_compaction  # Sliding-window history compactor
+from llm_factory import get_llm  # Shared, connection-pooled Gemini client
+from semantic_cache import SemanticLLMCache  # Semantic cache for repeated queries
+import asyncio  # For running the async agent loop
+import sys  # For buffered stdout writes
 
 # Load environment variables from .env file (e.g., GEMINI_API_KEY)
 load_dotenv()
@@ -17,32 +21,56 @@ class AgentState(TypedDict):
     """
     messages: List[HumanMessage | AIMessage]  # List of human and AI messages
 
-# Initialize the Gemini 2.5 Pro model
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",  # Specify the Gemini model
-    google_api_key=os.getenv("GEMINI_API_KEY"),  # Load API key from environment
-    temperature=0.3,  # Control randomness (0 = deterministic, 1 = creative)
-    max_tokens=1000  # Limit response length
-)
+# Get the shared Gemini client (one pooled connection per configuration)
+llm = get_llm()
 
-def process(state: AgentState) -> AgentState:
+# Semantic cache so repeated/near-duplicate queries skip the Gemini round-trip
+cache = SemanticLLMCache()
+
+async def process(state: AgentState) -> AgentState:
     """
     Processes the user input and generates a response using the LLM.
-    
+    The node is async so the Gemini round-trip does not block the event loop,
+    letting concurrent sessions overlap their network latency.
+
     Args:
         state: The current agent state containing the conversation messages
-    
+
     Returns:
         Updated state with the AI's response appended
     """
-    # Get the latest message from the state (user input)
-    latest_message = state["messages"]
-    # Invoke the LLM with the conversation history
-    response = llm.invoke(latest_message)
-    # Print the AI's response for user visibility
-    print(f"\nAI: {response.content}")
+    # Compact long histories (summary + last K turns) so the per-call token
+    # count stays bounded instead of growing with the whole session.
+    # Bind the message list to a local once: this node runs on every turn,
+    # so the repeated state["messages"] dict lookups add up
+    messages = await compact_messages(llm, state["messages"])
+    state["messages"] = messages
+    # Check the semantic cache first: embed the latest user message and key it
+    # on a hash of the prior context so answers are only reused in-context
+    context_key = SemanticLLMCache.context_key(messages[:-1])
+    embedding = await cache.embed(messages[-1].content)
+    cached = cache.lookup(embedding, context_key)
+    if cached is not None:
+        # Cache hit: skip the Gemini round-trip entirely (one stdout write)
+        sys.stdout.write(f"\nAI: {cached}\n")
+        sys.stdout.flush()
+        messages.append(AIMessage(content=cached))
+        return state
+    # Cache miss: stream the LLM response so tokens print as they are
+    # produced, cutting perceived latency to roughly the time-to-first-token
+    sys.stdout.write("\nAI: ")
+    chunks = []
+    async for chunk in llm.astream(messages):
+        sys.stdout.write(chunk.content)
+        sys.stdout.flush()  # Flush per chunk so tokens appear as they arrive
+        chunks.append(chunk.content)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+    content = "".join(chunks)
+    # Store the response for future repeats of this query
+    cache.put(embedding, content, context_key)
     # Append the AI's response to the state
-    state["messages"].append(AIMessage(content=response.content))
+    messages.append(AIMessage(content=content))
     return state
 
 # Create a LangGraph workflow
@@ -57,26 +85,39 @@ graph.add_edge("process", END)
 agent = graph.compile()
 
 # Main loop to interact with the user
-def run_chat_agent():
+async def run_chat_agent():
     """
     Runs the interactive chat agent.
     Users can input queries, and the agent responds until 'exit' is entered.
     """
     print("\n=== SIMPLE CHAT AGENT ===")
+    # Prompt session gives async terminal input (with line editing and
+    # history) that cooperates with background tasks on the event loop
+    session = PromptSession()
     # Initialize an empty conversation history
     conversation_history = []
-    # Prompt for user input
-    user_input = input("Enter: ")
+    user_input = await session.prompt_async("Enter: ")
     while user_input.lower() != "exit":
         # Append user input as a HumanMessage to the history
         conversation_history.append(HumanMessage(content=user_input))
-        # Invoke the agent with the current history
-        result = agent.invoke({"messages": conversation_history})
-        # Update the conversation history with the result
+        # Invoke the agent asynchronously with the current history
+        result = await agent.ainvoke({"messages": conversation_history})
         conversation_history = result["messages"]
-        # Prompt for the next input
-        user_input = input("Enter: ")
+        # Once the history is about to cross the compaction threshold,
+        # summarize it in the background so the round-trip overlaps with the
+        # user's think-time. The lookahead of 1 accounts for the next user
+        # message: without it the in-node check (which runs after that
+        # message is appended) would cross the threshold one step before
+        # this one and pay the summarization on the critical path
+        compact_task = None
+        if needs_compaction(conversation_history, lookahead=1):
+            compact_task = asyncio.create_task(
+                compact_messages(llm, conversation_history, lookahead=1)
+            )
+        user_input = await session.prompt_async("Enter: ")
+        if compact_task is not None:
+            conversation_history = await compact_task
 
 # Run the agent if the script is executed directly
 if __name__ == "__main__":
-    run_chat_agent()
\ No newline at end of file
+    asyncio.run(run_chat_agent())
\ No newline at end of file
@@ -0,0 +1,78 @@
+# Import necessary libraries for the history compactor
+from typing import List  # For type hints
+from langchain_core.messages import BaseMessage, SystemMessage  # Message types
+
+# Number of most recent messages kept verbatim when compacting
+DEFAULT_KEEP = 20
+
+# Prefix identifying the summary message a previous compaction produced
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+# Instruction given to the LLM when summarizing the older prefix
+SUMMARIZE_PROMPT = SystemMessage(content=(
+    "Summarize the following conversation concisely, keeping all facts, "
+    "names, and decisions that later turns might refer back to."
+))
+
+
+async def compact_messages(llm, messages: List[BaseMessage],
+                           keep: int = DEFAULT_KEEP,
+                           lookahead: int = 0) -> List[BaseMessage]:
+    """
+    Compacts a growing conversation history with a sliding window.
+
+    Passing the full history to Gemini on every turn makes the token count —
+    and with it the network payload and server-side prefill work — grow
+    quadratically over a session. This keeps only the last `keep` messages
+    verbatim and replaces the older prefix with a single summary message
+    produced by the LLM.
+
+    Compaction only fires once the history has grown well past `keep`
+    (to 2x keep): compacting down to `keep` messages plus the summary and
+    then re-summarizing as soon as one more message arrives would put a
+    summarization round-trip on every turn. An existing leading summary
+    from a previous compaction is folded into the newly summarized prefix
+    rather than stacked on top of it.
+
+    Args:
+        llm: The chat model used to summarize the older messages
+        messages: The full conversation history
+        keep: How many recent messages to keep verbatim
+        lookahead: Messages that will arrive before the next check (see
+            needs_compaction)
+
+    Returns:
+        The original list if it is short enough, otherwise a new list of a
+        summary SystemMessage followed by the last `keep` messages
+    """
+    if not needs_compaction(messages, keep, lookahead):
+        return messages
+    # Summarize everything older than the sliding window; a leading summary
+    # message from an earlier compaction is part of that prefix, so its
+    # contents carry over into the new summary instead of being lost
+    summary = await llm.ainvoke([SUMMARIZE_PROMPT] + list(messages[:-keep]))
+    return [
+        SystemMessage(content=f"{SUMMARY_PREFIX}{summary.content}")
+    ] + list(messages[-keep:])
+
+
+def needs_compaction(messages: List[BaseMessage], keep: int = DEFAULT_KEEP,
+                     lookahead: int = 0) -> bool:
+    """
+    Reports whether compact_messages would actually summarize this history.
+
+    Callers that want to compact ahead of time — like the REPL loops, which
+    summarize during user think-time so the in-node compaction finds the
+    history already under the threshold — pass a `lookahead` of how many
+    messages will be appended before the next in-node check.
+
+    Args:
+        messages: The conversation history to check
+        keep: How many recent messages compaction keeps verbatim
+        lookahead: Messages that will arrive before the next check
+
+    Returns:
+        True once the history (plus lookahead) has grown past twice the
+        keep window
+    """
+    return len(messages) + lookahead > 2 * keep
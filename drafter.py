@@ -1,13 +1,19 @@
 # Import necessary libraries for type hints, LangChain, and LangGraph
 from typing import Annotated, Sequence, TypedDict  # For type hints and state definition
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage  # Message types
-from langchain_google_genai import ChatGoogleGenerativeAI  # Gemini 2.5 Pro model
-from langchain_core.tools import tool  # For defining tools
+from langchain_core.tools import tool, InjectedToolCallId  # For defining tools
 from langgraph.graph import StateGraph, END  # For building the workflow graph
-from langgraph.prebuilt import ToolNode  # Prebuilt node for tool execution
+from langgraph.prebuilt import ToolNode, InjectedState  # Prebuilt node for tool execution
 from langgraph.graph.message import add_messages  # Helper for adding messages to state
+from langgraph.types import Command, interrupt  # For state updates and human-in-the-loop pauses
+from langgraph.checkpoint.memory import MemorySaver  # Checkpointer required for interrupts
 from dotenv import load_dotenv  # For loading environment variables
+from prompt_toolkit import PromptSession  # Async terminal input with history
+from functools import lru_cache  # For caching the system prompt per document
+from llm_factory import get_llm  # Shared, connection-pooled Gemini client
+import asyncio  # For running the async agent loop
 import os  # For file operations and environment variables
+import sys  # For buffered stdout writes
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,52 +25,57 @@ class AgentState(TypedDict):
     Stores conversation messages and supports message accumulation.
     """
     messages: Annotated[Sequence[BaseMessage], add_messages]  # List of messages with automatic accumulation
+    document: str  # Current document content (kept in state so sessions are isolated)
 
-# Initialize global variable to store document content
-document_content = ""
-
-# Initialize the Gemini 2.5 Pro model
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",  # Specify the Gemini model
-    google_api_key=os.getenv("GEMINI_API_KEY"),  # Load API key from environment
-    temperature=0.3,  # Control randomness (0 = deterministic, 1 = creative)
-    max_tokens=1000  # Limit response length
-)
+# Get the shared Gemini client (one pooled connection per configuration)
+llm = get_llm()
 
 
 # Define tools for document editing
 @tool
-def update(content: str) -> str:
+def update(content: str, tool_call_id: Annotated[str, InjectedToolCallId]) -> Command:
     """
     Updates the document with the provided content.
-    
+
     Args:
         content: The new content for the document
-    
+
     Returns:
-        A confirmation message with the updated content
+        A Command updating the document in state with a confirmation message
     """
-    global document_content  # Access the global document content
-    document_content = content  # Update the content
-    return f"Document has been updated successfully! The current content is:\n{document_content}"
+    # Return a Command so the new content lands in graph state rather than a
+    # module-level global; this keeps concurrent sessions isolated
+    return Command(update={
+        "document": content,
+        "messages": [ToolMessage(
+            content=f"Document has been updated successfully! The current content is:\n{content}",
+            tool_call_id=tool_call_id
+        )]
+    })
 
 @tool
-def save(filename: str) -> str:
+def save(filename: str, state: Annotated[AgentState, InjectedState]) -> str:
     """
     Saves the current document to a text file.
-    
+
     Args:
         filename: Name for the text file (appends .txt if not present)
-    
+
     Returns:
         A confirmation message or error message
     """
-    global document_content  # Access the global document content
+    document = state.get("document", "")  # Read the document from graph state
     if not filename.endswith('.txt'):
         filename = f"{filename}.txt"  # Ensure .txt extension
     try:
-        with open(filename, 'w') as file:
-            file.write(document_content)  # Write content to file
+        # Encode once and write in binary mode with a large (1MB) buffer:
+        # skips the text-layer encoding pass per write and keeps big drafts
+        # from being flushed in small 8KB chunks; fsync makes the save durable
+        data = document.encode("utf-8")
+        with open(filename, 'wb', buffering=1 << 20) as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
         print(f"\n💾 Document has been saved to: {filename}")
         return f"Document has been saved successfully to '{filename}'."
     except Exception as e:
@@ -72,69 +83,110 @@ def save(filename: str) -> str:
 
 # Combine tools for the agent
 tools = [update, save]
-# Bind tools to the model for tool-calling
+# Touch each tool's args schema so the JSON schemas are generated eagerly at
+# import time; otherwise the first invoke pays the lazy schema-build cost
+for _t in tools:
+    _ = _t.args
+# Bind tools to the model once for tool-calling; every invoke reuses the
+# same serialized tool schemas from this bound model
 model = llm.bind_tools(tools)
 
-def our_agent(state: AgentState) -> AgentState:
+@lru_cache(maxsize=1)
+def _system_message(document: str) -> SystemMessage:
     """
-    Processes user input and generates a response, potentially calling tools.
-    
+    Builds the system prompt for the given document content.
+    Cached so the f-string interpolation only reruns when the document
+    actually changes, not on every turn.
+
     Args:
-        state: The current agent state with messages
-    
+        document: The current document content
+
     Returns:
-        Updated state with new messages
+        The SystemMessage guiding the agent
     """
-    # Define a system prompt to guide the agent
-    system_prompt = SystemMessage(content=f"""
+    return SystemMessage(content=f"""
     You are Drafter, a helpful writing assistant. You help users update and modify documents.
     - Use the 'update' tool to modify document content.
     - Use the 'save' tool to save the document and finish.
     - Always show the current document state after modifications.
-    Current document content: {document_content}
+    Current document content: {document}
     """)
 
-    # Get or prompt for user input
+async def our_agent(state: AgentState) -> AgentState:
+    """
+    Processes user input and generates a response, potentially calling tools.
+    The node is async so the Gemini call does not block the event loop.
+
+    Args:
+        state: The current agent state with messages
+
+    Returns:
+        Updated state with new messages
+    """
+    # Get the (cached) system prompt for the current document content
+    system_prompt = _system_message(state.get("document", ""))
+
+    # Get the user input: on later turns, pause the graph with interrupt()
+    # instead of blocking the node on input(); the driver collects the input
+    # and resumes the graph with Command(resume=...)
     if not state["messages"]:
         user_input = "I'm ready to help you update a document. What would you like to create?"
-        user_message = HumanMessage(content=user_input)
+        user_echo = ""
     else:
-        user_input = input("\nWhat would you like to do with the document? ")
-        print(f"\n👤 USER: {user_input}")
-        user_message = HumanMessage(content=user_input)
-
-    # Combine system prompt, existing messages, and new user message
-    all_messages = [system_prompt] + list(state["messages"]) + [user_message]
-    # Invoke the model with the messages
-    response = model.invoke(all_messages)
-    
-    # Print the AI's response
-    print(f"\n🤖 AI: {response.content}")
-    # Check for tool calls and print them
+        user_input = interrupt({"prompt": "What would you like to do with the document? "})
+        user_echo = f"\n👤 USER: {user_input}\n"
+    user_message = HumanMessage(content=user_input)
+
+    # Combine system prompt, existing messages, and new user message without
+    # the intermediate lists that repeated + concatenation would allocate
+    all_messages = [system_prompt]
+    all_messages.extend(state["messages"])
+    all_messages.append(user_message)
+    # Stream the model response so tokens print as they arrive, while
+    # aggregating the chunks to recover the full message (and any tool calls).
+    # The user echo and AI header go out in one write; only the streamed
+    # chunks need their own flushes
+    sys.stdout.write(f"{user_echo}\n🤖 AI: ")
+    response = None
+    async for chunk in model.astream(all_messages):
+        if chunk.content:
+            sys.stdout.write(chunk.content)
+            sys.stdout.flush()  # Flush per chunk so tokens appear as they arrive
+        # Message chunks support +, which merges content and tool calls
+        response = chunk if response is None else response + chunk
+    # Emit the trailer (and any tool-call line) as a single write
+    trailer = ["\n"]
     if hasattr(response, "tool_calls") and response.tool_calls:
-        print(f"🔧 USING TOOLS: {[tc['name'] for tc in response.tool_calls]}")
+        trailer.append(f"🔧 USING TOOLS: {[tc['name'] for tc in response.tool_calls]}\n")
+    sys.stdout.write("".join(trailer))
+    sys.stdout.flush()
     
-    # Return updated state with new messages
-    return {"messages": list(state["messages"]) + [user_message, response]}
+    # Return only the new messages; the add_messages reducer on AgentState
+    # appends them, so there is no need to copy the full history each turn
+    return {"messages": [user_message, response]}
+
+# Edge labels hoisted to module level; the conditional-edge function fires on
+# every graph step, so it should do as little work as possible
+_CONT, _END = "continue", "end"
 
 def should_continue(state: AgentState) -> str:
     """
     Determines if the workflow should continue or end based on tool calls.
-    
+
     Args:
         state: The current agent state
-    
+
     Returns:
         "continue" to call tools, "end" to finish
     """
     messages = state["messages"]
-    if not messages:
-        return "continue"
-    # Check the most recent message for tool calls
-    for message in reversed(messages):
-        if isinstance(message, ToolMessage) and "saved" in message.content.lower():
-            return "end"  # End if document was saved
-    return "continue"
+    # Only the most recent message can be the save confirmation, so check it
+    # directly (O(1)) against the exact prefix the save tool returns instead
+    # of scanning and lowercasing the whole history
+    last = messages[-1] if messages else None
+    if isinstance(last, ToolMessage) and last.content.startswith("Document has been saved"):
+        return _END  # End if document was saved
+    return _CONT
 
 # Define the LangGraph workflow
 graph = StateGraph(AgentState)
@@ -149,26 +201,61 @@ graph.add_edge("agent", "tools")
 graph.add_conditional_edges(
     "tools",
     should_continue,
-    {"continue": "agent", "end": END}
+    {_CONT: "agent", _END: END}
 )
-# Compile the graph
-app = graph.compile()
+# Compile the graph with a checkpointer so interrupt()/resume works
+checkpointer = MemorySaver()
+app = graph.compile(checkpointer=checkpointer)
 
-def run_document_agent():
+async def run_document_agent():
     """
     Runs the interactive drafter agent.
     Users can edit and save documents until the save tool is used.
     """
     print("\n=== DRAFTER AGENT ===")
-    state = {"messages": []}  # Initialize empty state
-    # Stream the workflow and print messages
-    for step in app.stream(state, stream_mode="values"):
-        if "messages" in step:
-            for message in step["messages"][-3:]:  # Show last 3 messages
-                if isinstance(message, ToolMessage):
-                    print(f"\n🛠️ TOOL RESULT: {message.content}")
+    # Prompt session gives async terminal input (with line editing and
+    # history) that cooperates with background tasks on the event loop
+    session = PromptSession()
+    config = {"configurable": {"thread_id": "drafter"}}  # Thread for the checkpointer
+    # Start from an empty state; after each interrupt, resume with the input
+    next_input = {"messages": [], "document": ""}
+    while True:
+        # Stream node updates (only the new messages per step) instead of
+        # full state values, so nothing already printed is rescanned
+        async for step in app.astream(next_input, config, stream_mode="updates"):
+            for node, update in step.items():
+                if node == "__interrupt__" or not isinstance(update, dict):
+                    continue  # Interrupt markers carry no messages
+                for message in update.get("messages", []):
+                    if isinstance(message, ToolMessage):
+                        print(f"\n🛠️ TOOL RESULT: {message.content}")
+        # If the graph paused at interrupt(), collect input and resume it
+        snapshot = await app.aget_state(config)
+        if not snapshot.next:
+            break  # Graph ran to completion (document was saved)
+        user_input = await session.prompt_async("\nWhat would you like to do with the document? ")
+        next_input = Command(resume=user_input)
     print("\n=== DRAFTER FINISHED ===")
 
+async def run_document_agent_batch(states: list) -> list:
+    """
+    Runs the drafter workflow over many initial states concurrently.
+    Useful for batch scenarios (e.g., evaluating the drafter on many prompts),
+    where overlapping the Gemini round-trips gives near-linear speedup.
+    Each run gets its own checkpointer thread; runs that pause at the input
+    interrupt return their state as of the pause.
+
+    Args:
+        states: A list of initial agent states to run through the workflow
+
+    Returns:
+        A list of final states, in the same order as the inputs
+    """
+    return await asyncio.gather(*[
+        app.ainvoke(state, {"configurable": {"thread_id": f"drafter-batch-{i}"}})
+        for i, state in enumerate(states)
+    ])
+
 # Run the agent if the script is executed
 if __name__ == "__main__":
-    run_document_agent()
\ No newline at end of file
+    asyncio.run(run_document_agent())
\ No newline at end of file
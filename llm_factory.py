@@ -0,0 +1,36 @@
+# Import necessary libraries for the shared LLM factory
+from functools import lru_cache  # For caching one client per configuration
+from langchain_google_genai import ChatGoogleGenerativeAI  # Gemini chat model
+from dotenv import load_dotenv  # For loading environment variables
+import os  # For accessing environment variables
+
+# Load environment variables from .env file (e.g., GEMINI_API_KEY)
+load_dotenv()
+
+
+@lru_cache(maxsize=8)
+def get_llm(model: str = "gemini-2.0-flash", temperature: float = 0.3,
+            max_tokens: int = 1000) -> ChatGoogleGenerativeAI:
+    """
+    Returns a shared ChatGoogleGenerativeAI client for the given settings.
+
+    Each ChatGoogleGenerativeAI instance carries its own underlying HTTP
+    client and connection pool, so constructing one per module duplicates
+    TLS handshakes and blocks connection reuse when agents are co-imported.
+    Caching one client per (model, temperature, max_tokens) tuple lets every
+    agent with the same settings share a single pooled connection.
+
+    Args:
+        model: The Gemini model name
+        temperature: Control randomness (0 = deterministic, 1 = creative)
+        max_tokens: Limit response length
+
+    Returns:
+        A cached ChatGoogleGenerativeAI instance for these settings
+    """
+    return ChatGoogleGenerativeAI(
+        model=model,  # Specify the Gemini model
+        google_api_key=os.getenv("GEMINI_API_KEY"),  # Load API key from environment
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
@@ -1,14 +1,33 @@
 # Import necessary libraries for type hints and LangChain components
 from typing import TypedDict, List, Union  # For type hints and state definition
 from langchain_core.messages import HumanMessage, AIMessage  # Message types
-from langchain_google_genai import ChatGoogleGenerativeAI  # Gemini 2.5 Pro model
 from langgraph.graph import StateGraph, START, END  # For building the workflow graph
 from dotenv import load_dotenv  # For loading environment variables
+from prompt_toolkit import PromptSession  # Async terminal input with history
+from compaction import compact_messages, needs_compaction  # Sliding-window history compactor
+from llm_factory import get_llm  # Shared, connection-pooled Gemini client
+from semantic_cache import SemanticLLMCache  # Semantic cache for repeated queries
+import asyncio  # For running the async agent loop
 import os  # For file operations
+import sys  # For buffered stdout writes
+
+# zstandard is optional: without it (or with LOG_AS_TEXT set) logs stay as
+# plain text for easy human inspection
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
 
 # Load environment variables
 load_dotenv()
 
+# Force the human-readable plaintext log even when zstandard is installed
+LOG_AS_TEXT = bool(os.getenv("LOG_AS_TEXT"))
+
+# Per-turn state dumps are O(history) and clutter stdout; only emit them
+# when explicitly debugging
+DEBUG = bool(os.getenv("DEBUG"))
+
 # Define the state structure for the memory agent
 class AgentState(TypedDict):
     """
@@ -17,32 +36,60 @@ class AgentState(TypedDict):
     """
     messages: List[Union[HumanMessage, AIMessage]]  # List of human and AI messages
 
-# Initialize the Gemini 2.5 Pro model
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",  # Specify the Gemini model
-    google_api_key=os.getenv("GEMINI_API_KEY"),  # Load API key from environment
-    temperature=0.3,  # Control randomness (0 = deterministic, 1 = creative)
-    max_tokens=1000  # Limit response length
-)
+# Get the shared Gemini client (one pooled connection per configuration)
+llm = get_llm()
+
+# Semantic cache so repeated/near-duplicate queries skip the Gemini round-trip
+cache = SemanticLLMCache()
+
+# Log-line formatters keyed on message type: one dict lookup per message when
+# saving instead of a chain of isinstance checks
+FORMATTERS = {
+    HumanMessage: lambda m: f"You: {m.content}\n",
+    AIMessage: lambda m: f"AI: {m.content}\n\n",
+}
 
-def process(state: AgentState) -> AgentState:
+async def process(state: AgentState) -> AgentState:
     """
     Processes user input, generates a response, and updates the state.
-    
+    The node is async so the Gemini call does not block the event loop.
+
     Args:
         state: The current agent state with messages
-    
+
     Returns:
         Updated state with the AI's response
     """
-    # Invoke the LLM with the current messages
-    response = llm.invoke(state["messages"])
-    # Append the AI's response to the state
-    state["messages"].append(AIMessage(content=response.content))
-    # Print the AI's response
-    print(f"\nAI: {response.content}")
-    # Print the current state for debugging
-    print("CURRENT STATE: ", [msg.content for msg in state["messages"]])
+    # Compact long histories (summary + last K turns) so the per-call token
+    # count stays bounded instead of growing with the whole session.
+    # Bind the message list to a local once: this node runs on every turn,
+    # so the repeated state["messages"] dict lookups add up
+    messages = await compact_messages(llm, state["messages"])
+    state["messages"] = messages
+    # Check the semantic cache first, keyed on the prior conversation context
+    context_key = SemanticLLMCache.context_key(messages[:-1])
+    embedding = await cache.embed(messages[-1].content)
+    cached = cache.lookup(embedding, context_key)
+    if cached is not None:
+        # Cache hit: reuse the stored response instead of calling Gemini
+        messages.append(AIMessage(content=cached))
+        response_content = cached
+    else:
+        # Cache miss: invoke the LLM asynchronously with the current messages
+        response = await llm.ainvoke(messages)
+        # Store the response for future repeats of this query
+        cache.put(embedding, response.content, context_key)
+        # Append the AI's response to the state
+        messages.append(AIMessage(content=response.content))
+        response_content = response.content
+    # Emit the whole turn's output as one stdout write instead of one
+    # syscall per print
+    parts = [f"\nAI: {response_content}\n"]
+    if DEBUG:
+        # Per-turn state dump for debugging (O(history), hence the guard)
+        parts.append(f"CURRENT STATE:  {[msg.content for msg in messages]}\n")
+    sys.stdout.write("".join(parts))
+    sys.stdout.flush()
     return state
 
 # Define the LangGraph workflow
@@ -55,34 +102,66 @@ graph.add_edge("process", END)
 # Compile the graph
 agent = graph.compile()
 
-def run_memory_agent():
+async def run_memory_agent():
     """
     Runs the interactive memory agent.
     Maintains conversation history and saves it to a file when exiting.
     """
     print("\n=== MEMORY AGENT ===")
-    conversation_history = []  # Initialize empty history
-    user_input = input("Enter: ")
+    # Prompt session gives async terminal input (with line editing and
+    # history) that cooperates with background tasks on the event loop
+    session = PromptSession()
+    # Two views of the conversation: the full transcript stays intact for the
+    # exit-time log, while only the LLM's view gets compacted
+    full_history = []
+    llm_history = []
+    user_input = await session.prompt_async("Enter: ")
     while user_input.lower() != "exit":
-        # Append user input as a HumanMessage
-        conversation_history.append(HumanMessage(content=user_input))
-        # Invoke the agent
-        result = agent.invoke({"messages": conversation_history})
-        # Update the history
-        conversation_history = result["messages"]
-        user_input = input("Enter: ")
+        # Append user input as a HumanMessage to both views
+        user_message = HumanMessage(content=user_input)
+        full_history.append(user_message)
+        llm_history.append(user_message)
+        # Invoke the agent asynchronously
+        result = await agent.ainvoke({"messages": llm_history})
+        llm_history = result["messages"]
+        # Record the AI response the node appended in the full transcript
+        full_history.append(llm_history[-1])
+        # Once the LLM view is about to cross the compaction threshold,
+        # summarize it in the background so the round-trip overlaps with the
+        # user's think-time. The lookahead of 1 accounts for the next user
+        # message: without it the in-node check (which runs after that
+        # message is appended) would cross the threshold one step before
+        # this one and pay the summarization on the critical path
+        compact_task = None
+        if needs_compaction(llm_history, lookahead=1):
+            compact_task = asyncio.create_task(
+                compact_messages(llm, llm_history, lookahead=1)
+            )
+        user_input = await session.prompt_async("Enter: ")
+        if compact_task is not None:
+            llm_history = await compact_task
     
-    # Save conversation history to a file
-    with open("logging.txt", "w") as file:
-        file.write("Your Conversation Log:\n")
-        for message in conversation_history:
-            if isinstance(message, HumanMessage):
-                file.write(f"You: {message.content}\n")
-            elif isinstance(message, AIMessage):
-                file.write(f"AI: {message.content}\n\n")
-        file.write("End of Conversation")
-    print("Conversation saved to logging.txt")
+    # Save conversation history to a file: format each message through the
+    # type-keyed FORMATTERS table and join the whole log in memory, so the
+    # file sees a single write() instead of one per message
+    lines = ["Your Conversation Log:\n"]
+    for message in full_history:
+        formatter = FORMATTERS.get(type(message))
+        if formatter:  # Skip message types that don't belong in the log
+            lines.append(formatter(message))
+    lines.append("End of Conversation")
+    log = "".join(lines)
+    if zstd is not None and not LOG_AS_TEXT:
+        # Compress the log (~4-10x smaller for long sessions), so there are
+        # far fewer disk bytes to write now and to read back later
+        with open("logging.zst", "wb") as file:
+            file.write(zstd.ZstdCompressor(level=3).compress(log.encode("utf-8")))
+        print("Conversation saved to logging.zst")
+    else:
+        with open("logging.txt", "w") as file:
+            file.write(log)
+        print("Conversation saved to logging.txt")
 
 # Run the agent if the script is executed
 if __name__ == "__main__":
-    run_memory_agent()
\ No newline at end of file
+    asyncio.run(run_memory_agent())
\ No newline at end of file
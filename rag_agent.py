@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI,GoogleGenerativeAIEmbeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from llm_factory import get_llm  # Shared, connection-pooled Gemini client
 from langgraph.graph import StateGraph, END
 from typing import TypedDict, Annotated, Sequence
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, ToolMessage
@@ -14,12 +15,8 @@ from langchain_core.tools import tool
 
 load_dotenv()
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",  # Specify the Gemini model
-    google_api_key=os.getenv("GEMINI_API_KEY"),  # Load API key from environment
-    temperature=0,  # Control randomness (0 = deterministic, 1 = creative)
-    max_tokens=1000  # Limit response length
-)
+# Get the shared Gemini client (one pooled connection per configuration)
+llm = get_llm(temperature=0)  # 0 = deterministic answers over the document
 
 # Our Embedding Model - has to also be compatible with the LLM
 embeddings = GoogleGenerativeAIEmbeddings( # Changed from OpenAIEmbeddings to GoogleGenerativeAIEmbeddings
@@ -1,13 +1,14 @@
 # Import necessary libraries for type hints, LangChain, and LangGraph
-import os
+import asyncio
+import sys  # For buffered stdout writes
+from functools import lru_cache  # For memoizing the pure calculator functions
 from typing import Annotated, Sequence, TypedDict  # For type hints and state definition
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage # Message types
-from langchain_google_genai import ChatGoogleGenerativeAI  # Gemini 2.5 Pro model
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, ToolMessage # Message types
 from langchain_core.tools import tool  # For defining tools
 from langgraph.graph import StateGraph, END  # For building the workflow graph
-from langgraph.prebuilt import ToolNode  # Prebuilt node for tools
 from langgraph.graph.message import add_messages  # Helper for message accumulation
 from dotenv import load_dotenv  # For environment variables
+from llm_factory import get_llm  # Shared, connection-pooled Gemini client
 
 # Load environment variables
 load_dotenv()
@@ -20,121 +21,188 @@ class AgentState(TypedDict):
     """
     messages: Annotated[Sequence[BaseMessage], add_messages]  # List of messages
 
-# Initialize the Gemini 2.5 Pro model
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",  # Specify the Gemini model
-    google_api_key=os.getenv("GEMINI_API_KEY"),  # Load API key from environment
-    temperature=0.3,  # Control randomness (0 = deterministic, 1 = creative)
-    max_tokens=1000  # Limit response length
-)
+# Get the shared Gemini client (one pooled connection per configuration)
+llm = get_llm()
+
+# Memoized implementations of the pure calculator functions.
+# Repeated tool calls with the same arguments (common when the model retries
+# or re-derives intermediate results) short-circuit to an O(1) cache hit.
+@lru_cache(maxsize=1024)
+def _add(a: int, b: int) -> int:
+    return a + b
+
+@lru_cache(maxsize=1024)
+def _subtract(a: int, b: int) -> int:
+    return a - b
+
+@lru_cache(maxsize=1024)
+def _multiply(a: int, b: int) -> int:
+    return a * b
 
 # Define tools for calculations
 @tool
-def add(a: int, b: int) -> int:
+async def add(a: int, b: int) -> int:
     """
     Adds two numbers together.
-    
+
     Args:
         a: First integer
         b: Second integer
-    
+
     Returns:
         The sum of a and b
     """
-    return a + b
+    return _add(a, b)
 
 @tool
-def subtract(a: int, b: int) -> int:
+async def subtract(a: int, b: int) -> int:
     """
     Subtracts the second number from the first.
-    
+
     Args:
         a: First integer
         b: Second integer
-    
+
     Returns:
         The difference of a and b
     """
-    return a - b
+    return _subtract(a, b)
 
 @tool
-def multiply(a: int, b: int) -> int:
+async def multiply(a: int, b: int) -> int:
     """
     Multiplies two numbers.
-    
+
     Args:
         a: First integer
         b: Second integer
-    
+
     Returns:
         The product of a and b
     """
-    return a * b
+    return _multiply(a, b)
 
 # Combine tools
 tools = [add, subtract, multiply]
-# Bind tools to the model
+# Map tool names to tools for dispatch in the custom tools node
+tool_map = {t.name: t for t in tools}
+# Touch each tool's args schema so the JSON schemas are generated eagerly at
+# import time; otherwise the first invoke pays the lazy schema-build cost
+for _t in tools:
+    _ = _t.args
+# Bind tools to the model once; the calculator tools are called many times
+# per session and every invoke reuses the same serialized schemas
 model = llm.bind_tools(tools)
 
-def model_call(state: AgentState) -> AgentState:
+# System prompt is constant, so build the message once at import time instead
+# of re-allocating it on every model_call
+SYSTEM_MSG = SystemMessage(content="You are an AI assistant that performs calculations using tools.")
+
+async def model_call(state: AgentState) -> AgentState:
     """
-    Calls the LLM with a system prompt and current messages.
-    
+    Calls the LLM asynchronously with a system prompt and current messages.
+
     Args:
         state: The current agent state
-    
+
     Returns:
         Updated state with the LLM's response
     """
-    system_prompt = SystemMessage(content="You are an AI assistant that performs calculations using tools.")
-    response = model.invoke([system_prompt] + state["messages"])
+    response = await model.ainvoke([SYSTEM_MSG] + state["messages"])
     return {"messages": [response]}
 
+async def _run_tool_call(tc: dict) -> str:
+    """
+    Runs a single tool call, returning errors as text instead of raising.
+    The tool name and args come from the model, so a hallucinated name or
+    mistyped argument must surface as a ToolMessage the model can read and
+    self-correct from, not crash the graph.
+
+    Args:
+        tc: The tool call dict (name, args, id) from the model
+
+    Returns:
+        The tool result, or an error description
+    """
+    tool = tool_map.get(tc["name"])
+    if tool is None:
+        return (f"Error: tool '{tc['name']}' does not exist. "
+                f"Available tools: {', '.join(tool_map)}.")
+    try:
+        return str(await tool.ainvoke(tc["args"]))
+    except Exception as e:
+        return f"Error running {tc['name']}: {e}"
+
+async def tools_node(state: AgentState) -> AgentState:
+    """
+    Executes all tool calls from the last message concurrently.
+    The calculator tools are pure and independent, so dispatching them with
+    asyncio.gather overlaps their latencies: per-turn tool time drops from
+    the sum of the individual calls to the slowest one.
+
+    Args:
+        state: The current agent state
+
+    Returns:
+        Updated state with one ToolMessage per tool call
+    """
+    tool_calls = state["messages"][-1].tool_calls
+    # Launch every tool call concurrently and wait for all results
+    results = await asyncio.gather(*[_run_tool_call(tc) for tc in tool_calls])
+    return {"messages": [
+        ToolMessage(content=result, tool_call_id=tc["id"], name=tc["name"])
+        for result, tc in zip(results, tool_calls)
+    ]}
+
+# Edge labels hoisted to module level; the conditional-edge function fires on
+# every graph step, so it should do as little work as possible
+_CONT, _END = "continue", "end"
+
 def should_continue(state: AgentState) -> str:
     """
     Checks if the last message contains tool calls.
-    
+    getattr guards messages without a tool_calls attribute in one lookup.
+
     Args:
         state: The current agent state
-    
+
     Returns:
         "continue" if tool calls are present, "end" otherwise
     """
-    messages = state["messages"]
-    last_message = messages[-1]
-    if not last_message.tool_calls:
-        return "end"
-    return "continue"
+    return _CONT if getattr(state["messages"][-1], "tool_calls", None) else _END
 
 # Define the LangGraph workflow
 graph = StateGraph(AgentState)
 graph.add_node("our_agent", model_call)
-graph.add_node("tools", ToolNode(tools=tools))
+graph.add_node("tools", tools_node)
 graph.set_entry_point("our_agent")
 graph.add_conditional_edges(
     "our_agent",
     should_continue,
-    {"continue": "tools", "end": END}
+    {_CONT: "tools", _END: END}
 )
 graph.add_edge("tools", "our_agent")
 app = graph.compile()
 
-def print_stream(stream):
+async def print_stream(stream):
     """
-    Prints the output of the workflow stream.
-    
+    Prints the output of the async workflow stream.
+    Each step's output is formatted into one string and written with a
+    single stdout write, instead of the many small writes pretty_print does.
+
     Args:
-        stream: The stream of state updates from the workflow
+        stream: The async stream of state updates from the workflow
     """
-    for s in stream:
+    async for s in stream:
         message = s["messages"][-1]
         if isinstance(message, tuple):
-            print(message)
+            sys.stdout.write(f"{message}\n")
         else:
-            message.pretty_print()
+            sys.stdout.write(message.pretty_repr() + "\n")
+        sys.stdout.flush()
 
 # Example usage
 if __name__ == "__main__":
     print("\n=== REACT AGENT ===")
     inputs = {"messages": [HumanMessage(content="Add 40 + 12 and then multiply the result by 6. Also tell me a joke please.")]}
-    print_stream(app.stream(inputs, stream_mode="values"))
\ No newline at end of file
+    asyncio.run(print_stream(app.astream(inputs, stream_mode="values")))
\ No newline at end of file
@@ -0,0 +1,139 @@
+# Import necessary libraries for the semantic cache helper
+from hashlib import sha256  # For hashing the surrounding conversation context
+from math import sqrt  # For computing cosine similarity
+from typing import List, Optional  # For type hints
+from langchain_core.messages import BaseMessage  # Base message type for context keys
+from langchain_google_genai import GoogleGenerativeAIEmbeddings  # Gemini embedding model
+from dotenv import load_dotenv  # For loading environment variables
+import os  # For accessing environment variables
+
+# Load environment variables from .env file (e.g., GEMINI_API_KEY)
+load_dotenv()
+
+
+class SemanticLLMCache:
+    """
+    A small in-process semantic cache for LLM responses.
+
+    Chat agents often see repeated or near-duplicate user queries. Instead of
+    paying the full network round-trip to Gemini every time, the agents embed
+    the latest user message and look it up here first: a hit replaces a
+    hundreds-of-milliseconds network call with an in-memory vector lookup,
+    while a miss costs only the embedding call.
+
+    Entries are keyed on (context key, embedding): the context key is a hash
+    of the surrounding conversation (or any other state, e.g. a document
+    hash), so a cached answer is only reused when the rest of the context
+    matches too.
+    """
+
+    def __init__(self, embeddings: Optional[GoogleGenerativeAIEmbeddings] = None,
+                 threshold: float = 0.95, max_entries: int = 256):
+        """
+        Initializes the cache.
+
+        Args:
+            embeddings: Embedding model to use (defaults to Gemini embedding-001)
+            threshold: Minimum cosine similarity for a lookup to count as a hit
+            max_entries: Maximum number of cached responses (oldest evicted first)
+        """
+        self.embeddings = embeddings or GoogleGenerativeAIEmbeddings(
+            model="models/embedding-001",  # Gemini embedding model
+            task_type="SEMANTIC_SIMILARITY",  # Similarity search over cached queries
+            google_api_key=os.getenv("GEMINI_API_KEY")  # Load API key from environment
+        )
+        self.threshold = threshold
+        self.max_entries = max_entries
+        # Each entry is a (context_key, embedding, response) tuple
+        self._entries: List[tuple] = []
+
+    @staticmethod
+    def context_key(messages: List[BaseMessage], window: int = 4) -> str:
+        """
+        Builds a hash of the last few prior messages so cached responses are
+        only reused when the immediate context matches.
+
+        Only the trailing `window` messages are hashed: a digest of the whole
+        history would change on every turn (and, after compaction, include a
+        nondeterministic summary), so a question repeated later in the
+        session could never hit the cache.
+
+        Args:
+            messages: The messages preceding the query being cached
+            window: How many trailing messages to include in the key
+
+        Returns:
+            A hex digest identifying the context
+        """
+        digest = sha256()
+        for message in messages[-window:]:
+            digest.update(str(message.content).encode("utf-8"))
+            digest.update(b"\x00")  # Separator so adjacent messages don't merge
+        return digest.hexdigest()
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embeds the given text asynchronously with the cache's embedding model.
+
+        Args:
+            text: The query text to embed
+
+        Returns:
+            The embedding vector
+        """
+        return await self.embeddings.aembed_query(text)
+
+    def lookup(self, embedding: List[float], context_key: str = "") -> Optional[str]:
+        """
+        Looks up a cached response for the given query embedding.
+
+        Args:
+            embedding: Embedding of the query text
+            context_key: Hash of the surrounding context (must match exactly)
+
+        Returns:
+            The cached response on a hit, or None on a miss
+        """
+        best_score = self.threshold
+        best_response = None
+        for entry_key, entry_embedding, entry_response in self._entries:
+            if entry_key != context_key:
+                continue  # Different conversation context; not reusable
+            score = self._cosine(embedding, entry_embedding)
+            if score >= best_score:
+                best_score = score
+                best_response = entry_response
+        return best_response
+
+    def put(self, embedding: List[float], response: str, context_key: str = "") -> None:
+        """
+        Stores a response under the given query embedding and context key.
+
+        Args:
+            embedding: Embedding of the query text
+            response: The LLM response content to cache
+            context_key: Hash of the surrounding context
+        """
+        self._entries.append((context_key, embedding, response))
+        # Evict the oldest entry once the cache is full
+        if len(self._entries) > self.max_entries:
+            self._entries.pop(0)
+
+    @staticmethod
+    def _cosine(a: List[float], b: List[float]) -> float:
+        """
+        Computes the cosine similarity between two vectors.
+
+        Args:
+            a: First vector
+            b: Second vector
+
+        Returns:
+            Cosine similarity in [-1, 1] (0.0 for zero-length vectors)
+        """
+        dot = sum(x * y for x, y in zip(a, b))
+        norm_a = sqrt(sum(x * x for x in a))
+        norm_b = sqrt(sum(x * x for x in b))
+        if norm_a == 0.0 or norm_b == 0.0:
+            return 0.0
+        return dot / (norm_a * norm_b)